@@ -1,12 +1,49 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
 import pandas as pd
 import json
-from io import StringIO
+from io import BytesIO, StringIO
 
 # FAST API URL
 FASTAPI_URL = "http://127.0.0.1:8000"
 
+@st.cache_resource
+def get_session():
+    """Shared HTTP session with connection pooling so every 'Clean Data' click reuses the same socket."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=3))
+    return session
+
+SESSION = get_session()
+
+@st.cache_data(show_spinner=False)
+def parse_upload(name: str, data: bytes) -> pd.DataFrame:
+    """Parses an uploaded file once per unique content; script reruns hit the cache."""
+    bio = BytesIO(data)
+    return pd.read_csv(bio) if name.endswith(".csv") else pd.read_excel(bio)
+
+@st.cache_data(show_spinner=False)
+def post_clean_request(endpoint: str, payload: dict):
+    """Posts a clean request once per payload; unrelated widget reruns reuse the result.
+
+    Raises on non-200 responses so Streamlit never memoizes a failure — the
+    next click re-hits the backend instead of replaying a transient error.
+    """
+    response = SESSION.post(f"{FASTAPI_URL}{endpoint}", json=payload)
+    if response.status_code != 200:
+        raise RuntimeError(response.text)
+    return response.status_code, response.text
+
+def to_dataframe(cleaned_data_raw):
+    """Rebuilds a DataFrame from the backend's split-orient cleaned_data payload."""
+    if isinstance(cleaned_data_raw, str):
+        cleaned_data_raw = json.loads(cleaned_data_raw)
+    if isinstance(cleaned_data_raw, dict) and "data" in cleaned_data_raw:
+        return pd.DataFrame(**cleaned_data_raw)
+    return pd.DataFrame(cleaned_data_raw)
+
 # Streamlit UI Configuration
 st.set_page_config(page_title="AutoData - Cleaning Automation", layout="wide")
 
@@ -25,11 +62,7 @@ if data_source == "CSV/Excel File":
     uploaded_file = st.file_uploader("Upload your data file here", type=["csv", "xlsx", "xls"])
 
     if uploaded_file is not None:
-        file_extension = uploaded_file.name.split('.')[-1]
-        if file_extension == "csv":
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
+        df = parse_upload(uploaded_file.name, uploaded_file.getvalue())
 
         st.success("✅ File Uploaded Successfully!")
         st.markdown("### 🔍 Raw Data Preview")
@@ -37,16 +70,35 @@ if data_source == "CSV/Excel File":
 
     if uploaded_file and st.button("🚀 Clean Data"):
         with st.spinner("Cleaning your data with AI magic..."):
-            files = {"file": (uploaded_file.name, uploaded_file.getvalue())}
-            response = requests.post(f"{FASTAPI_URL}/clean_data/", files=files)
+            # MultipartEncoder streams the body from Streamlit's spooled
+            # buffer as it uploads; requests' files= would pre-encode the
+            # whole multipart payload in memory first
+            uploaded_file.seek(0)
+            encoder = MultipartEncoder(
+                fields={"file": (uploaded_file.name, uploaded_file, "application/octet-stream")}
+            )
+            response = SESSION.post(f"{FASTAPI_URL}/clean_data/", data=encoder,
+                                    headers={"Content-Type": encoder.content_type}, stream=True)
 
         if response.status_code == 200:
-            st.success("✅ Data Cleaned Successfully!")
-            st.markdown("### 🧾 Cleaned Data")
             try:
-                cleaned_data_raw = response.json()["cleaned_data"]
-                cleaned_data = pd.DataFrame(json.loads(cleaned_data_raw)) if isinstance(cleaned_data_raw, str) else pd.DataFrame(cleaned_data_raw)
+                # NDJSON stream: first line is the cleaned data, the rest are AI analysis chunks
+                lines = (line for line in response.iter_lines() if line)
+                head = json.loads(next(lines))
+
+                st.success("✅ Data Cleaned Successfully!")
+                st.markdown("### 🧾 Cleaned Data")
+                cleaned_data_raw = head["cleaned_data"]
+                cleaned_data = to_dataframe(cleaned_data_raw)
                 st.dataframe(cleaned_data, use_container_width=True)
+
+                st.markdown("### 🤖 AI Analysis")
+                analysis_placeholder = st.empty()
+                analysis_text = ""
+                for line in lines:
+                    chunk = json.loads(line)
+                    analysis_text += chunk.get("ai_chunk", "")
+                    analysis_placeholder.markdown(analysis_text)
             except Exception as e:
                 st.error(f"❌ Error converting data to DataFrame: {e}")
         else:
@@ -60,19 +112,22 @@ elif data_source == "Database Query":
 
     if st.button("🚀 Fetch and Clean Data"):
         with st.spinner("Executing query and cleaning data..."):
-            response = requests.post(f"{FASTAPI_URL}/clean_db/", json={"query": query, "db_url": db_url})
+            try:
+                status_code, body = post_clean_request("/clean_db/", {"query": query, "db_url": db_url})
+            except RuntimeError as e:
+                status_code, body = None, str(e)
 
-        if response.status_code == 200:
+        if status_code == 200:
             st.success("✅ Data Cleaned Successfully!")
             try:
-                cleaned_data_raw = response.json()["cleaned_data"]
-                cleaned_data = pd.DataFrame(json.loads(cleaned_data_raw)) if isinstance(cleaned_data_raw, str) else pd.DataFrame(cleaned_data_raw)
+                cleaned_data_raw = json.loads(body)["cleaned_data"]
+                cleaned_data = to_dataframe(cleaned_data_raw)
                 st.markdown("### 🧾 Cleaned Data")
                 st.dataframe(cleaned_data, use_container_width=True)
             except Exception as e:
                 st.error(f"❌ Error converting data to DataFrame: {e}")
         else:
-            st.error(f"❌ Failed to fetch/clean data from database: {response.text}")
+            st.error(f"❌ Failed to fetch/clean data from database: {body}")
 
 #API Data
 elif data_source == "API Data":
@@ -81,19 +136,22 @@ elif data_source == "API Data":
 
     if st.button("🚀 Fetch and Clean Data"):
         with st.spinner("Fetching and cleaning API data..."):
-            response = requests.post(f"{FASTAPI_URL}/clean_api/", json={"api_url": api_url})
+            try:
+                status_code, body = post_clean_request("/clean_api/", {"api_url": api_url})
+            except RuntimeError as e:
+                status_code, body = None, str(e)
 
-        if response.status_code == 200:
+        if status_code == 200:
             st.success("✅ API Data Cleaned Successfully!")
             try:
-                cleaned_data_raw = response.json()["cleaned_data"]
-                cleaned_data = pd.DataFrame(json.loads(cleaned_data_raw)) if isinstance(cleaned_data_raw, str) else pd.DataFrame(cleaned_data_raw)
+                cleaned_data_raw = json.loads(body)["cleaned_data"]
+                cleaned_data = to_dataframe(cleaned_data_raw)
                 st.markdown("### 🧾 Cleaned Data")
                 st.dataframe(cleaned_data, use_container_width=True)
             except Exception as e:
                 st.error(f"❌ Error converting data to DataFrame: {e}")
         else:
-            st.error(f"❌ Failed to clean API data: {response.text}")
+            st.error(f"❌ Failed to clean API data: {body}")
 
 #Footer
 st.markdown("""
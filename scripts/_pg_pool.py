@@ -0,0 +1,36 @@
+from psycopg2.pool import ThreadedConnectionPool
+
+# ✅ Update these credentials
+DB_HOST = "localhost"
+DB_PORT = "5433"
+DB_NAME = "demodb"  # Replace with your actual database name
+DB_USER = "postgres"
+DB_PASSWORD = "0707"
+
+# Shared pool: every psycopg2.connect pays a full TCP + auth round-trip, so
+# scripts that issue several small queries should borrow a warm connection
+# here instead of reconnecting each time. Built lazily so importing this
+# module never opens a socket.
+_pool = None
+
+def get_pool() -> ThreadedConnectionPool:
+    """Returns the shared connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ThreadedConnectionPool(
+            1, 8,
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT,
+        )
+    return _pool
+
+def getconn():
+    """Borrows a connection from the shared pool."""
+    return get_pool().getconn()
+
+def putconn(conn):
+    """Returns a borrowed connection to the pool for reuse."""
+    get_pool().putconn(conn)
@@ -1,9 +1,12 @@
+import asyncio
+import json
+import re
 import google.generativeai as genai
 import pandas as pd
 from dotenv import load_dotenv
 import os
 from langgraph.graph import StateGraph, END
-from pydantic import BaseModel
+from dataclasses import dataclass, field
 from typing import List, Dict, Any
 
 # Load API key from environment
@@ -19,17 +22,100 @@ genai.configure(api_key=gemini_api_key)
 # Define AI Model
 model = genai.GenerativeModel('gemini-1.5-flash')
 
-class CleaningState(BaseModel):
+# Prompt templates are built once at import; call sites only pay a .format()
+_PROFILE_PROMPT = """
+You are an AI Data Cleaning Agent. Analyze the dataset profile:
+{profile_text}
+
+Please provide:
+1. Data quality assessment
+2. Missing value analysis
+3. Outlier detection
+4. Recommended cleaning steps
+5. Data type corrections needed
+
+Format your response as structured text with clear sections.
+"""
+
+_FRAMES_PROMPT = """
+You are an AI Data Cleaning Agent. Analyze each dataset section below independently.
+Start your answer for each section with the exact tag line '### REQUEST <number>', then provide:
+1. Data quality assessment
+2. Missing value analysis
+3. Outlier detection
+4. Recommended cleaning steps
+5. Data type corrections needed
+
+{sections}
+"""
+
+_COLUMN_PROMPT = """
+Analyze this column data and suggest cleaning operations:
+Column: {column_name}
+Sample values: {sample_data}
+
+Provide specific cleaning recommendations:
+1. Data type conversion needed
+2. Pattern standardization
+3. Invalid value handling
+4. Missing value strategy
+"""
+
+_REPORT_PROMPT = """
+Generate a comprehensive data quality report for this dataset:
+
+Dataset Statistics:
+- Total Rows: {total_rows}
+- Total Columns: {total_columns}
+- Missing Values: {missing_values}
+- Duplicate Rows: {duplicate_rows}
+- Column Data Types: {data_types}
+
+Column Names: {column_names}
+
+Sample Data (first 3 rows):
+{sample_rows}
+
+Provide:
+1. Executive Summary
+2. Data Quality Score (1-10)
+3. Critical Issues Found
+4. Recommended Actions
+5. Priority Cleaning Steps
+"""
+
+@dataclass(slots=True)
+class CleaningState:
     """State schema defining input and output for the LangGraph agent."""
     input_text: str
     structured_response: str = ""
-    batch_data: List[Dict[str, Any]] = []
-    cleaned_responses: List[str] = []
+    batch_data: List[Dict[str, Any]] = field(default_factory=list)
+    cleaned_responses: List[str] = field(default_factory=list)
 
 class AIAgent:
     def __init__(self):
-        self.graph = self.create_graph()
-    
+        self._graph = None
+
+    @property
+    def graph(self):
+        """Compiled LangGraph, built lazily; kept for future multi-node pipelines."""
+        if self._graph is None:
+            self._graph = self.create_graph()
+        return self._graph
+
+    def _gen(self, prompt: str) -> str:
+        """Calls Gemini directly, skipping the graph's per-call state machinery.
+
+        With a single-node graph the StateGraph dispatch and state
+        validation add pure overhead on every call.
+        """
+        try:
+            response = model.generate_content(prompt)
+            return response.text or ""
+        except Exception as e:
+            print(f"❌ Error in agent logic: {e}")
+            return f"Error: {str(e)}"
+
     def create_graph(self):
         """Creates and returns a LangGraph agent graph with state management."""
         graph = StateGraph(CleaningState)
@@ -56,63 +142,90 @@ class AIAgent:
         graph.set_entry_point("cleaning_agent")
         return graph.compile()
     
-    def process_data(self, df, batch_size=20):
-        """Processes data in batches to avoid Gemini's token limit."""
-        cleaned_responses = []
-        
-        for i in range(0, len(df), batch_size):
-            df_batch = df.iloc[i:i + batch_size]  # ✅ Process 20 rows at a time
-            
-            # Create batch prompt
-            batch_text = ""
-            for idx, row in df_batch.iterrows():
-                batch_text += f"Row {idx}: {row.to_dict()}\n"
-            
-            prompt = f"""
-You are an AI Data Cleaning Agent. Analyze the dataset:
-{batch_text}
+    def _profile(self, df):
+        """Builds a compact schema + sample profile of a DataFrame.
 
-Please provide:
-1. Data quality assessment
-2. Missing value analysis
-3. Outlier detection
-4. Recommended cleaning steps
-5. Data type corrections needed
+        Gemini latency scales with input tokens, so instead of shipping every
+        row we send dtypes, null counts, describe() statistics, and a 5-row
+        sample — enough signal for quality analysis at a fraction of the cost.
+        """
+        return {
+            "shape": df.shape,
+            "dtypes": df.dtypes.astype(str).to_dict(),
+            "nulls": df.isna().sum().to_dict(),
+            "describe": df.describe(include='all').to_dict(),
+            "sample": df.sample(min(5, len(df)), random_state=0).to_dict(orient='records'),
+        }
 
-Format your response as structured text with clear sections.
-"""
-            
-            try:
-                # Process batch through the graph
-                initial_state = CleaningState(input_text=prompt)
-                result = self.graph.invoke(initial_state)
-                
-                cleaned_responses.append({
-                    'batch_number': i // batch_size + 1,
-                    'rows_processed': len(df_batch),
-                    'analysis': result['structured_response']
-                })
-                
-                print(f"✅ Processed batch {i // batch_size + 1}/{(len(df) - 1) // batch_size + 1}")
-                
-            except Exception as e:
-                print(f"❌ Error processing batch {i // batch_size + 1}: {e}")
-                cleaned_responses.append({
-                    'batch_number': i // batch_size + 1,
-                    'rows_processed': len(df_batch),
-                    'analysis': f"Error: {str(e)}"
-                })
-        
-        return cleaned_responses
+    def _build_profile_prompt(self, df):
+        """Builds the analysis prompt from a dataset profile."""
+        profile_text = json.dumps(self._profile(df), default=str)
+        return _PROFILE_PROMPT.format(profile_text=profile_text)
+
+    async def process_data_async(self, df):
+        """Analyzes a DataFrame in a single async Gemini round-trip."""
+        try:
+            response = await model.generate_content_async(self._build_profile_prompt(df))
+            analysis = response.text if response.text else ""
+            print("✅ Processed dataset profile")
+        except Exception as e:
+            print(f"❌ Error processing dataset profile: {e}")
+            analysis = f"Error: {str(e)}"
+
+        return [{
+            'batch_number': 1,
+            'rows_processed': len(df),
+            'analysis': analysis
+        }]
+
+    async def stream_analysis_async(self, df):
+        """Yields Gemini analysis text as it arrives.
+
+        Streaming keeps time-to-first-token low so callers can surface
+        partial analysis instead of blocking on the full response.
+        """
+        response = await model.generate_content_async(self._build_profile_prompt(df), stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    async def analyze_frames_async(self, frames):
+        """Analyzes several DataFrames in one Gemini call, one tagged section each.
+
+        Used by the backend micro-batcher to coalesce concurrent requests:
+        the fixed instruction prefix is paid once instead of once per request.
+        Returns one analysis string per input frame, in order.
+        """
+        sections = ""
+        for i, df in enumerate(frames, start=1):
+            sections += f"### REQUEST {i}\n{json.dumps(self._profile(df), default=str)}\n"
+
+        prompt = _FRAMES_PROMPT.format(sections=sections)
+        response = await model.generate_content_async(prompt)
+        text = response.text if response.text else ""
+
+        # Split the combined response back into per-request sections by tag
+        parts = re.split(r"###\s*REQUEST\s*(\d+)", text)
+        analyses = {}
+        for tag, body in zip(parts[1::2], parts[2::2]):
+            analyses[int(tag)] = body.strip()
+
+        return [analyses.get(i, text.strip()) for i in range(1, len(frames) + 1)]
+
+    def process_data(self, df):
+        """Analyzes a DataFrame in a single profile-based Gemini call."""
+        analysis = self._gen(self._build_profile_prompt(df))
+        print("✅ Processed dataset profile")
+
+        return [{
+            'batch_number': 1,
+            'rows_processed': len(df),
+            'analysis': analysis
+        }]
     
     def analyze_single_text(self, text: str) -> str:
         """Analyzes a single text input using the AI agent."""
-        try:
-            initial_state = CleaningState(input_text=text)
-            result = self.graph.invoke(initial_state)
-            return result['structured_response']
-        except Exception as e:
-            return f"Error analyzing text: {str(e)}"
+        return self._gen(text)
     
     def clean_column(self, df, column_name: str) -> pd.DataFrame:
         """Cleans a specific column in the DataFrame using AI analysis."""
@@ -123,17 +236,7 @@ Format your response as structured text with clear sections.
         # Get sample data for analysis
         sample_data = df[column_name].dropna().head(10).tolist()
         
-        prompt = f"""
-Analyze this column data and suggest cleaning operations:
-Column: {column_name}
-Sample values: {sample_data}
-
-Provide specific cleaning recommendations:
-1. Data type conversion needed
-2. Pattern standardization
-3. Invalid value handling
-4. Missing value strategy
-"""
+        prompt = _COLUMN_PROMPT.format(column_name=column_name, sample_data=sample_data)
         
         analysis = self.analyze_single_text(prompt)
         print(f"📊 Analysis for column '{column_name}':")
@@ -152,28 +255,15 @@ Provide specific cleaning recommendations:
             'data_types': df.dtypes.to_dict()
         }
         
-        prompt = f"""
-Generate a comprehensive data quality report for this dataset:
-
-Dataset Statistics:
-- Total Rows: {stats['total_rows']}
-- Total Columns: {stats['total_columns']}
-- Missing Values: {stats['missing_values']}
-- Duplicate Rows: {stats['duplicate_rows']}
-- Column Data Types: {stats['data_types']}
-
-Column Names: {list(df.columns)}
-
-Sample Data (first 3 rows):
-{df.head(3).to_dict()}
-
-Provide:
-1. Executive Summary
-2. Data Quality Score (1-10)
-3. Critical Issues Found
-4. Recommended Actions
-5. Priority Cleaning Steps
-"""
+        prompt = _REPORT_PROMPT.format(
+            total_rows=stats['total_rows'],
+            total_columns=stats['total_columns'],
+            missing_values=stats['missing_values'],
+            duplicate_rows=stats['duplicate_rows'],
+            data_types=stats['data_types'],
+            column_names=list(df.columns),
+            sample_rows=df.head(3).to_dict()
+        )
         
         return self.analyze_single_text(prompt)
 
@@ -203,9 +293,9 @@ def example_usage():
     report = agent.generate_data_report(df)
     print(report)
     
-    # Process data in batches
-    print("\n🔄 Processing data in batches...")
-    results = agent.process_data(df, batch_size=2)
+    # Process data
+    print("\n🔄 Processing data...")
+    results = agent.process_data(df)
     
     for result in results:
         print(f"\n📋 Batch {result['batch_number']} ({result['rows_processed']} rows):")
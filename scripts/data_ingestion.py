@@ -53,12 +53,19 @@ class DataIngestion:
             print(f"❌ Error loading data from database: {e}")
             return None
 
-    def fetch_from_api(self, api_url, params=None):
-        """Fetches data from an API and returns it as a DataFrame."""
+    def fetch_from_api(self, api_url, params=None, limit=None):
+        """Fetches data from an API and returns it as a DataFrame.
+
+        When limit is given the JSON records are sliced before DataFrame
+        construction, so blocks are never allocated for rows that would be
+        thrown away by a head() afterwards.
+        """
         try:
             response = requests.get(api_url, params=params)
             if response.status_code == 200:
                 data = response.json()
+                if limit is not None and isinstance(data, list):
+                    data = data[:limit]
                 df = pd.DataFrame(data)
                 print(f"✅ API Data Fetched Successfully: {api_url}")
                 return df
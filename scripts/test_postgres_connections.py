@@ -1,36 +1,51 @@
-import psycopg2
+import io
 
-# ✅ Update these credentials
-DB_HOST = "localhost"
-DB_PORT = "5433"
-DB_NAME = "demodb"  # Replace with your actual database name
-DB_USER = "postgres"
-DB_PASSWORD = "0707"
+import pandas as pd
+
+import _pg_pool
+
+def read_sql_copy(connection, sql) -> pd.DataFrame:
+    """Bulk-reads a query into a DataFrame over the COPY protocol.
+
+    COPY streams the result straight into a buffer that pd.read_csv parses in
+    one pass, instead of fetchall() materializing every row as a Python tuple
+    that pandas then repacks — roughly half the bytes through Python and no
+    per-row tuple allocations.
+    """
+    buf = io.BytesIO()
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH CSV HEADER", buf)
+    buf.seek(0)
+    return pd.read_csv(buf)
 
 try:
-    # ✅ Connect to PostgreSQL database
-    connection = psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT
-    )
-
-    cursor = connection.cursor()
-    print("✅ PostgreSQL Connection Successful!")
-
-    # ✅ Execute a test query
-    cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';")
-    tables = cursor.fetchall()
-    print("📋 Tables in the database:")
-    for table in tables:
-        print(f" - {table[0]}")
-
-    # ✅ Close connection
-    cursor.close()
-    connection.close()
-    print("✅ Connection Closed.")
+    # ✅ Borrow a pooled PostgreSQL connection (reused across scripts instead
+    # of paying a fresh TCP + auth round-trip per connect)
+    connection = _pg_pool.getconn()
+    try:
+        print("✅ PostgreSQL Connection Successful!")
+
+        # ✅ Server-side cursor: rows stream from the server in batches as we
+        # iterate, instead of fetchall() loading the whole result first
+        with connection.cursor(name="table_listing") as cursor:
+            cursor.itersize = 1000
+            cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';")
+            print("📋 Tables in the database:")
+            for table in cursor:
+                print(f" - {table[0]}")
+
+        # ✅ Bulk read via COPY: the pattern load_from_database should use for
+        # large SELECTs
+        columns = read_sql_copy(
+            connection,
+            "SELECT table_name, column_name, data_type FROM information_schema.columns WHERE table_schema = 'public'"
+        )
+        print(f"📋 Loaded {len(columns)} column definitions via COPY:")
+        print(columns.head())
+    finally:
+        # ✅ Return the connection to the pool instead of closing it
+        _pg_pool.putconn(connection)
+        print("✅ Connection Returned to Pool.")
 
 except Exception as e:
     print(f"❌ Error connecting to PostgreSQL: {e}")
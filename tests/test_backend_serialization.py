@@ -0,0 +1,20 @@
+import json
+import os
+
+import pandas as pd
+
+# ai_agent refuses to import without a key; serialization tests don't call Gemini
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from scripts.backend import json_response
+
+def test_json_response_round_trips_datetime_columns():
+    df = pd.DataFrame({
+        'ts': pd.to_datetime(['2024-01-01 12:00:00', None]),
+        'x': [1, 2],
+    })
+    response = json_response({"cleaned_data": df.to_dict(orient='split')})
+    payload = json.loads(response.body)
+    data = payload["cleaned_data"]["data"]
+    assert data[0][0].startswith('2024-01-01')
+    assert data[0][1] == 1
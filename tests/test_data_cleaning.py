@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from scripts.data_cleaning import DataCleaning, _fill_nan, _iqr_outlier_mask
+
+def test_fill_nan_fills_missing_values():
+    # Exercises whichever kernel is active (numba when installed, else numpy)
+    filled = _fill_nan(np.array([1.0, np.nan, 3.0]), 2.0)
+    np.testing.assert_array_equal(filled, [1.0, 2.0, 3.0])
+
+def test_iqr_outlier_mask_flags_outliers_not_nans():
+    arr = np.array([[1.0], [2.0], [np.nan], [3.0], [1000.0]])
+    q1, q3 = np.nanpercentile(arr, [25, 75], axis=0)
+    mask = _iqr_outlier_mask(arr, q1, q3, 1.5)
+    assert mask.tolist() == [False, False, False, False, True]
+
+def test_fix_data_types_converts_datetime_columns():
+    cleaner = DataCleaning(pd.DataFrame({
+        'date': ['2024-01-01', '2024-01-02', 'not a date'],
+    }))
+    cleaner.fix_data_types({'date': 'datetime'})
+    assert pd.api.types.is_datetime64_any_dtype(cleaner.df['date'])
+    assert cleaner.df['date'].iloc[0] == pd.Timestamp('2024-01-01')
+    assert pd.isna(cleaner.df['date'].iloc[2])
+
+def test_mean_imputation_fills_nans_including_nullable_dtypes():
+    cleaner = DataCleaning(pd.DataFrame({
+        'a': [1.0, np.nan, 3.0],
+        'b': pd.array([10, pd.NA, 30], dtype='Int64'),
+    }))
+    cleaner.handle_missing_values(strategy='mean')
+    assert not cleaner.df.isna().any().any()
+    assert cleaner.df['a'].tolist() == [1.0, 2.0, 3.0]
+    assert cleaner.df['b'].tolist() == [10.0, 20.0, 30.0]